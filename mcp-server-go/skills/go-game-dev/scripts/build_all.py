@@ -1,7 +1,9 @@
+import functools
 import os
 import subprocess
 import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 # Go Game Cross-Compilation Script
 # Supported Targets: Windows, Linux, macOS, Web (Wasm)
@@ -17,55 +19,118 @@ TARGETS = [
     {"os": "js", "arch": "wasm", "ext": ".wasm", "flags": ""}
 ]
 
+# All targets build at once, so give each go build an equal share of
+# the cores instead of letting every one of them use all of them.
+JOBS = str(max(1, (os.cpu_count() or 1) // len(TARGETS)))
+
+def _output_name(target):
+    return f"{APP_NAME}_{target['os']}_{target['arch']}{target['ext']}"
+
+def _cmd_for(target):
+    output_path = os.path.join(OUTPUT_DIR, _output_name(target))
+
+    # Base commands
+    # -trimpath keeps cache keys independent of the checkout location
+    cmd = ["go", "build", "-trimpath", "-p", JOBS, "-o", output_path]
+
+    # Add ldflags for production (strip debug info, hide console on Windows)
+    # -s: disable symbol table
+    # -w: disable DWARF generation
+    ldflags = "-s -w"
+    if target["flags"]:
+        ldflags += " " + target["flags"]
+
+    cmd.extend(["-ldflags", ldflags])
+
+    # Handle package path (assuming main is in current dir or cmd/game)
+    # Adjust this if your main.go is elsewhere
+    if os.path.exists("cmd/game/main.go"):
+        cmd.append("./cmd/game")
+    else:
+        cmd.append(".")
+
+    return cmd
+
+# TARGETS is fixed, so render every go build argv once at import time
+BUILD_SPECS = [(t, _cmd_for(t)) for t in TARGETS]
+
+def _build_one(spec):
+    # Runs in a worker process; errors are returned, not raised, so the
+    # parent can report every target after the pool finishes.
+    target, cmd = spec
+    output_name = _output_name(target)
+
+    # The worker inherited the base env, so only the per-target vars are merged in.
+    env = os.environ | {"GOOS": target["os"], "GOARCH": target["arch"], "GOMAXPROCS": JOBS}
+
+    try:
+        # Capture output so concurrent builds don't interleave on the console
+        subprocess.run(cmd, env=env, check=True, capture_output=True, text=True)
+        return output_name, True, None
+    except subprocess.CalledProcessError as e:
+        return output_name, False, e
+
 def build():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
         
     print(f"🚀 Starting build for {APP_NAME}...")
     
-    for t in TARGETS:
-        env = os.environ.copy()
-        env["GOOS"] = t["os"]
-        env["GOARCH"] = t["arch"]
-        
-        output_name = f"{APP_NAME}_{t['os']}_{t['arch']}{t['ext']}"
-        output_path = os.path.join(OUTPUT_DIR, output_name)
-        
-        # Base commands
-        cmd = ["go", "build", "-o", output_path]
-        
-        # Add ldflags for production (strip debug info, hide console on Windows)
-        # -s: disable symbol table
-        # -w: disable DWARF generation
-        ldflags = "-s -w"
-        if t["flags"]:
-            ldflags += " " + t["flags"]
-        
-        cmd.extend(["-ldflags", ldflags])
-        
-        # Handle package path (assuming main is in current dir or cmd/game)
-        # Adjust this if your main.go is elsewhere
-        if os.path.exists("cmd/game/main.go"):
-            cmd.append("./cmd/game")
-        else:
-            cmd.append(".")
+    # Pin the build/module caches next to the project so they survive CI
+    # containers that wipe $HOME. Only GOOS/GOARCH differ between targets,
+    # so every build after the first reuses the compiled packages;
+    # the stdlib is still compiled (and cached) once per GOOS/GOARCH.
+    # Set on our own environment so pool workers inherit it at startup.
+    os.environ.update({
+        "GOCACHE": os.path.abspath(".gocache"),
+        "GOMODCACHE": os.path.abspath(".gomodcache"),
+        "GOPROXY": "https://proxy.golang.org,direct",
+        "GOFLAGS": "-mod=readonly",
+    })
 
+    # Each target is an independent go build, so run them side by side
+    workers = min(len(TARGETS), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_build_one, BUILD_SPECS))
+
+    for t, (output_name, ok, err) in zip(TARGETS, results):
         print(f"📦 Building {output_name}...")
-        try:
-            subprocess.run(cmd, env=env, check=True)
-            print(f"   ✅ Success: {output_path}")
-            
-            # Special handling for Wasm: Need checking HTML wrapper
-            if t["os"] == "js":
-                copy_wasm_exec(env)
-                
-        except subprocess.CalledProcessError as e:
-            print(f"   ❌ Failed: {e}")
-
-def copy_wasm_exec(env):
+        if not ok:
+            print(f"   ❌ Failed: {err}")
+            if err.stderr:
+                print(err.stderr.rstrip())
+            continue
+
+        print(f"   ✅ Success: {os.path.join(OUTPUT_DIR, output_name)}")
+
+        # Special handling for Wasm: Need checking HTML wrapper
+        if t["os"] == "js":
+            try:
+                copy_wasm_exec()
+            except (subprocess.CalledProcessError, OSError) as e:
+                print(f"   ❌ Failed to copy wasm_exec.js: {e}")
+                if getattr(e, "stderr", None):
+                    print(e.stderr.decode(errors="replace").rstrip())
+
+@functools.lru_cache(maxsize=1)
+def _goroot():
+    # GOROOT doesn't depend on GOOS/GOARCH, so ask go at most once
+    if os.environ.get("GOROOT"):
+        return os.environ["GOROOT"]
+    # The output is a single short path; stderr is kept so a failed
+    # lookup can explain itself
+    result = subprocess.run(
+        ["go", "env", "GOROOT"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=256,
+        check=True,
+    )
+    return result.stdout.decode().strip()
+
+def copy_wasm_exec():
     # Try to find wasm_exec.js in GOROOT
-    goroot = subprocess.check_output(["go", "env", "GOROOT"], env=env).decode().strip()
-    wasm_js = os.path.join(goroot, "misc", "wasm", "wasm_exec.js")
+    wasm_js = os.path.join(_goroot(), "misc", "wasm", "wasm_exec.js")
     
     if os.path.exists(wasm_js):
         dest = os.path.join(OUTPUT_DIR, "wasm_exec.js")
@@ -1,9 +1,92 @@
+import argparse
+import fnmatch
 import os
+import re
 import shutil
 import pathlib
 import sys
+import tarfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import zstandard  # 可选依赖，仅 --archive 模式使用
+except ImportError:
+    zstandard = None
 
 RELEASE_DIR_NAME = "mpm-release"
+PACKAGE_NAME = "MyProjectManager"
+
+# 定义需要包含的核心文件夹
+# 注意: mcp-server-go 包含完整的服务代码 (含 skills 目录)
+CORE_DIRS = [
+    "mcp-server-go",  # 当前核心服务 (包含 skills/)
+    "docs",  # 图片和额外文档
+]
+
+# 定义需要包含的核心根目录文件
+CORE_FILES = [
+    "README.md",
+    "README_EN.md",
+    "install.ps1",
+    "package_product.py",
+    "QUICKSTART.md",
+    "QUICKSTART_EN.md",
+    "docs/images/mpm_logo.png",  # Logo 已移至此处
+]
+
+# 定义需要包含的编译脚本
+BUILD_SCRIPTS = [
+    "scripts/build-windows.ps1",
+    "scripts/build-unix.sh",
+    "scripts/build-cross-platform.sh",
+]
+
+# user-manual 只保留精简版手册
+USER_MANUAL = "user-manual/COMPLETE-MANUAL-CONCISE.md"
+
+# 需要校验的关键二进制文件，均位于 BIN_MODULE 中
+BIN_MODULE = "mcp-server-go"
+REQUIRED_BINS = [
+    "mcp-server-go/bin/mpm-go.exe",
+    "mcp-server-go/bin/ast_indexer.exe",
+]
+
+# 打包时过滤掉的垃圾文件/目录
+# 注意: target 是 rust 编译目录，通常很大且非必需（除非我们从里面拿exe）
+# 我们假设exe已经移动到了 bin 目录
+IGNORE_PATTERNS = (
+    "__pycache__",
+    ".mcp-data",
+    ".git",
+    "*.pyc",
+    ".vscode",
+    ".idea",
+    "target",
+    "node_modules",
+    "debug_*",
+    "check_*",
+    "*.pdb",
+    "*.log",
+)
+
+# 预编译为单个正则，每个文件名只需匹配一次
+# Windows 下与 fnmatch.filter 一致，忽略大小写
+_IGNORE_RE = re.compile(
+    "|".join(fnmatch.translate(p) for p in IGNORE_PATTERNS),
+    re.IGNORECASE if os.name == "nt" else 0,
+)
+
+# 超过该大小的文件（如 mpm-go.exe / ast_indexer.exe）走内核拷贝快速路径
+LARGE_FILE_BYTES = 8 * 1024 * 1024
+
+# 加大复制缓冲区，减少多 MB 二进制的 read/write 次数（默认 Windows 1 MB / POSIX 64 KB）
+# 仅影响 shutil 的读写回退路径（如 Windows 上的小文件）和 --archive 的 tar 写入
+COPY_BUFSIZE = 4 * 1024 * 1024
+shutil.COPY_BUFSIZE = COPY_BUFSIZE
+
+# shutil 自 3.8 起在 Linux/macOS 上使用 sendfile/fcopyfile 零拷贝复制
+if sys.version_info < (3, 8):
+    sys.exit("❌ 打包脚本需要 Python 3.8+")
 
 # 设置 UTF-8 编码输出
 if sys.platform == "win32":
@@ -13,130 +96,192 @@ if sys.platform == "win32":
     sys.stderr = codecs.getwriter("utf-8")(sys.stderr.buffer, "strict")
 
 
-def package_mpm():
-    # 动态获取当前脚本所在目录作为根目录
-    root = pathlib.Path(__file__).parent.resolve()
+def _ignore_names(dirpath, names):
+    """copytree 风格的 ignore 回调，返回需要跳过的名字"""
+    return [n for n in names if _IGNORE_RE.match(n)]
 
-    release_root = root / RELEASE_DIR_NAME
-    dist = release_root / "MyProjectManager"
 
-    # 1. 如果 release_root 已存在，先清理（确保干净）
-    if release_root.exists():
-        shutil.rmtree(release_root)
+def _in_core_dir(rel):
+    """rel 是否位于某个核心文件夹内（这类文件已随该文件夹一起打包，无需重复处理）"""
+    return rel.split("/", 1)[0] in CORE_DIRS
 
-    # 创建多级目录
-    dist.mkdir(parents=True)
 
-    print(f"🚀 开始打包 MyProjectManager (Base: {root})...")
-    print(f"📂 目标路径: {dist}")
+def _scan_files(root, rel_paths):
+    """按父目录分组，每个目录只 scandir 一次，返回 {相对路径: DirEntry}（仅包含存在的项）"""
+    by_parent = {}
+    for rel in rel_paths:
+        parent, _, name = rel.rpartition("/")
+        by_parent.setdefault(parent, []).append((rel, name))
 
-    # 定义需要包含的核心文件夹
-    # 注意: mcp-server-go 包含完整的服务代码 (含 skills 目录)
-    core_dirs = [
-        "mcp-server-go",  # 当前核心服务 (包含 skills/)
-        "docs",  # 图片和额外文档
-    ]
-
-    # 定义需要包含的核心根目录文件
-    core_files = [
-        "README.md",
-        "README_EN.md",
-        "install.ps1",
-        "package_product.py",
-        "QUICKSTART.md",
-        "QUICKSTART_EN.md",
-        "docs/images/mpm_logo.png",  # Logo 已移至此处
-    ]
-
-    # 定义需要包含的编译脚本
-    build_scripts = [
-        "scripts/build-windows.ps1",
-        "scripts/build-unix.sh",
-        "scripts/build-cross-platform.sh",
-    ]
-
-    # 2. 复制文件夹 (带逻辑过滤)
-    for dname in core_dirs:
-        src_dir = root / dname
-        target_dir = dist / dname
+    found = {}
+    for parent, items in by_parent.items():
+        try:
+            with os.scandir(root / parent) as it:
+                entries = {entry.name: entry for entry in it}
+        except FileNotFoundError:
+            continue
+        for rel, name in items:
+            if name in entries:
+                found[rel] = entries[name]
+    return found
 
-        if src_dir.exists():
-            print(f"📦 正在打包模块: {dname}...")
-            # 过滤掉不需要的垃圾
-            # 注意: target 是 rust 编译目录，通常很大且非必需（除非我们从里面拿exe）
-            # 我们假设exe已经移动到了 bin 目录
-            shutil.copytree(
-                src_dir,
-                target_dir,
-                ignore=shutil.ignore_patterns(
-                    "__pycache__",
-                    ".mcp-data",
-                    ".git",
-                    "*.pyc",
-                    ".vscode",
-                    ".idea",
-                    "target",
-                    "node_modules",
-                    "debug_*",
-                    "check_*",
-                    "*.pdb",
-                    "*.log",
-                ),
-            )
-        else:
-            print(f"⚠️ 警告: 目录不存在 {dname}")
 
-    # 2.5. 特殊处理 user-manual：只保留 COMPLETE-MANUAL-CONCISE.md
+def _copy_file(src, dst):
+    """复制单个文件; Windows 上大文件交给 CopyFileW，由系统完成复制"""
+    if sys.platform == "win32" and os.path.getsize(src) >= LARGE_FILE_BYTES:
+        import ctypes
+
+        if ctypes.windll.kernel32.CopyFileW(str(src), str(dst), False):
+            shutil.copystat(src, dst)
+            return dst
+    # 其余情况 shutil.copy2 已使用 sendfile/fcopyfile，无需额外处理
+    return shutil.copy2(src, dst)
+
+
+def _raise_walk_error(err):
+    """os.walk 的 onerror 回调：无法读取的目录直接报错，而不是被静默跳过"""
+    raise err
+
+
+def _parallel_copytree(src, dst, ignore=None):
+    """与 shutil.copytree 等价（跟随符号链接、复制目录元数据、读取失败即报错），
+    但文件复制交给线程池并发执行（I/O 密集，线程即可）"""
+    src = pathlib.Path(src)
+    dst = pathlib.Path(dst)
+    dirs = []
+    files = []
+
+    # 先单线程遍历并建好全部目录，线程池只负责复制文件
+    for dirpath, dirnames, filenames in os.walk(src, onerror=_raise_walk_error, followlinks=True):
+        if ignore is not None:
+            ignored = set(ignore(dirpath, dirnames + filenames))
+            dirnames[:] = [d for d in dirnames if d not in ignored]
+            filenames = [f for f in filenames if f not in ignored]
+
+        target = dst / pathlib.Path(dirpath).relative_to(src)
+        os.makedirs(target, exist_ok=True)
+        dirs.append((dirpath, target))
+        for fname in filenames:
+            files.append((os.path.join(dirpath, fname), target / fname))
+
+    workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # list() 触发迭代，使任一文件复制失败的异常在这里抛出
+        list(executor.map(lambda pair: _copy_file(*pair), files))
+
+    # 与 copytree 一样在目录内容复制完之后再 copystat，子目录先于父目录，
+    # 避免写入文件时改掉已设置好的目录时间戳
+    for dirpath, target in reversed(dirs):
+        shutil.copystat(dirpath, target)
+
+
+def _copy_core_dir(root, dist, dname):
+    """复制核心文件夹 (带逻辑过滤)"""
+    src_dir = root / dname
+    if src_dir.exists():
+        print(f"📦 正在打包模块: {dname}...")
+        _parallel_copytree(src_dir, dist / dname, ignore=_ignore_names)
+    else:
+        print(f"⚠️ 警告: 目录不存在 {dname}")
+
+
+def _copy_user_manual(root, dist):
+    """特殊处理 user-manual：只保留 COMPLETE-MANUAL-CONCISE.md"""
     user_manual_src = root / "user-manual"
     user_manual_dst = dist / "user-manual"
     if user_manual_src.exists():
         print(f"📦 正在打包模块: user-manual (仅保留 COMPLETE-MANUAL-CONCISE.md)...")
         user_manual_dst.mkdir(parents=True)
-        concise_manual = user_manual_src / "COMPLETE-MANUAL-CONCISE.md"
+        concise_manual = root / USER_MANUAL
         if concise_manual.exists():
-            shutil.copy2(concise_manual, user_manual_dst / "COMPLETE-MANUAL-CONCISE.md")
+            shutil.copy2(concise_manual, user_manual_dst / concise_manual.name)
             print(f"✅ 已复制: COMPLETE-MANUAL-CONCISE.md")
         else:
             print(f"⚠️ 警告: COMPLETE-MANUAL-CONCISE.md 不存在")
     else:
         print(f"⚠️ 警告: user-manual 目录不存在")
 
-    # 3. 复制根目录文件
-    for fname in core_files:
-        src_file = root / fname
-        if src_file.exists():
+
+def _copy_core_files(root, dist):
+    """复制根目录文件（用 scandir 快照代替逐个 exists() 的 stat 调用）"""
+    found_files = _scan_files(root, CORE_FILES)
+    for fname in CORE_FILES:
+        entry = found_files.get(fname)
+        if entry is not None:
             print(f"📄 正在打包文件: {fname}...")
-            shutil.copy2(src_file, dist / fname)
+            # 位于核心文件夹内的文件（如 docs/images/mpm_logo.png）已由
+            # _copy_core_dir 并发复制，这里只确认存在，避免两个线程写同一文件
+            if not _in_core_dir(fname):
+                shutil.copy2(entry.path, dist / fname)
         else:
             print(f"⚠️ 警告: 文件不存在 {fname}")
 
-    # 3.5. 复制编译脚本
+
+def _copy_build_scripts(root, dist):
+    """复制编译脚本"""
     scripts_dst = dist / "scripts"
     scripts_dst.mkdir(parents=True, exist_ok=True)
-    for script in build_scripts:
-        src_script = root / script
-        if src_script.exists():
+    found_scripts = _scan_files(root, BUILD_SCRIPTS)
+    for script in BUILD_SCRIPTS:
+        entry = found_scripts.get(script)
+        if entry is not None:
             print(f"📄 正在打包编译脚本: {script}...")
-            shutil.copy2(src_script, scripts_dst / src_script.name)
+            shutil.copy2(entry.path, scripts_dst / entry.name)
         else:
             print(f"⚠️ 警告: 编译脚本不存在 {script}")
 
-    # 4. 验证关键二进制文件
-    required_bins = [
-        "mcp-server-go/bin/mpm-go.exe",
-        "mcp-server-go/bin/ast_indexer.exe",
-    ]
 
-    print("\n🔍 正在校验二进制完整性...")
-    all_exist = True
-    for bin_rel in required_bins:
-        bin_path = dist / bin_rel
-        if not bin_path.exists():
-            print(f"❌ 缺失: {bin_rel} (可能导致功能不全)")
-            all_exist = False
-        else:
-            size_mb = bin_path.stat().st_size / (1024 * 1024)
-            print(f"✅ 存在: {bin_rel} ({size_mb:.1f} MB)")
+def package_mpm():
+    # 动态获取当前脚本所在目录作为根目录
+    root = pathlib.Path(__file__).parent.resolve()
+
+    release_root = root / RELEASE_DIR_NAME
+    dist = release_root / PACKAGE_NAME
+
+    # 1. 如果 release_root 已存在，先改名挪开（O(1)），再在后台线程删除，
+    #    删除与后续复制的 I/O 重叠进行
+    cleanup = None
+    if release_root.exists():
+        old_root = release_root.with_suffix(".old")
+        if old_root.exists():
+            # 上次打包中断时可能残留
+            shutil.rmtree(old_root)
+        release_root.rename(old_root)
+        # 用 future 承载删除任务，删除失败的异常会保留到 result() 时再取出
+        cleaner = ThreadPoolExecutor(max_workers=1)
+        cleanup = cleaner.submit(shutil.rmtree, old_root)
+        cleaner.shutdown(wait=False)
+
+    # 创建多级目录
+    dist.mkdir(parents=True)
+
+    print(f"🚀 开始打包 {PACKAGE_NAME} (Base: {root})...")
+    print(f"📂 目标路径: {dist}")
+
+    # 2~3. 各模块的源目录与目标目录互不相交，交给线程池并发复制
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = {executor.submit(_copy_core_dir, root, dist, dname): dname for dname in CORE_DIRS}
+        futures[executor.submit(_copy_user_manual, root, dist)] = "user-manual"
+        futures[executor.submit(_copy_core_files, root, dist)] = "core_files"
+        futures[executor.submit(_copy_build_scripts, root, dist)] = "scripts"
+
+        # 4. 验证关键二进制文件
+        # 二进制都在 BIN_MODULE 中，该模块一复制完就开始校验，与其余复制重叠
+        verify_future = None
+        for future in as_completed(futures):
+            # 重新抛出工作线程中的异常
+            future.result()
+            if futures[future] == BIN_MODULE:
+                verify_future = executor.submit(_verify_bins, dist)
+
+        all_exist = verify_future.result()
+
+    # 等待旧发布目录删除完成（新发布包已生成，删除失败只提示不中断）
+    if cleanup is not None:
+        try:
+            cleanup.result()
+        except OSError as e:
+            print(f"\n⚠️ 警告: 旧发布目录删除失败，请手动清理 {old_root}: {e}")
 
     if not all_exist:
         print(f"\n⚠️ 警告: 部分二进制文件缺失，请先编译项目！")
@@ -146,5 +291,112 @@ def package_mpm():
     print(f"👉 只需将此文件夹拷贝到目标机器即可使用。")
 
 
+def _add_release_members(tar, root):
+    """把发布包内容直接从源目录写入 tar 流，返回 {包内相对路径: 大小}"""
+    sizes = {}
+    prefix = PACKAGE_NAME + "/"
+
+    def record(tarinfo):
+        sizes[tarinfo.name[len(prefix):]] = tarinfo.size
+        return tarinfo
+
+    def ignore_filter(tarinfo):
+        # 与目录复制相同的过滤规则；丢弃目录时其子树也一并跳过
+        if _IGNORE_RE.match(tarinfo.name.rpartition("/")[2]):
+            return None
+        return record(tarinfo)
+
+    for dname in CORE_DIRS:
+        src_dir = root / dname
+        if src_dir.exists():
+            print(f"📦 正在打包模块: {dname}...")
+            tar.add(src_dir, arcname=prefix + dname, filter=ignore_filter)
+        else:
+            print(f"⚠️ 警告: 目录不存在 {dname}")
+
+    loose_files = [(USER_MANUAL, USER_MANUAL)]
+    loose_files += [(fname, fname) for fname in CORE_FILES]
+    loose_files += [(script, "scripts/" + script.rpartition("/")[2]) for script in BUILD_SCRIPTS]
+
+    found = _scan_files(root, [src for src, _ in loose_files])
+    for src, arcname in loose_files:
+        entry = found.get(src)
+        if entry is not None:
+            print(f"📄 正在打包文件: {src}...")
+            # 与 _copy_core_files 一致：核心文件夹内的文件已随目录写入，避免重复成员
+            if not _in_core_dir(src):
+                tar.add(entry.path, arcname=prefix + arcname, filter=record)
+        else:
+            print(f"⚠️ 警告: 文件不存在 {src}")
+
+    return sizes
+
+
+def package_mpm_archive():
+    """不落地中间目录，直接从源文件流式生成单个压缩包"""
+    root = pathlib.Path(__file__).parent.resolve()
+
+    # 有 zstandard 时用多线程 zstd 压缩，否则退回标准库 gzip
+    suffix = ".tar.zst" if zstandard is not None else ".tar.gz"
+    archive_path = root / (RELEASE_DIR_NAME + suffix)
+
+    print(f"🚀 开始打包 {PACKAGE_NAME} (Base: {root})...")
+    print(f"📂 目标文件: {archive_path}")
+    if zstandard is None:
+        print("⚠️ 未安装 zstandard，改用 gzip 压缩 (pip install zstandard)")
+
+    with open(archive_path, "wb") as fh:
+        if zstandard is not None:
+            cctx = zstandard.ZstdCompressor(threads=-1)
+            with cctx.stream_writer(fh, closefd=False) as zfh:
+                with tarfile.open(fileobj=zfh, mode="w|", copybufsize=COPY_BUFSIZE) as tar:
+                    sizes = _add_release_members(tar, root)
+        else:
+            with tarfile.open(fileobj=fh, mode="w|gz", copybufsize=COPY_BUFSIZE) as tar:
+                sizes = _add_release_members(tar, root)
+
+    if not _report_bins(sizes):
+        print(f"\n⚠️ 警告: 部分二进制文件缺失，请先编译项目！")
+        return
+
+    print(f"\n✨ 大功告成！发布包已生成: {archive_path}")
+    print(f"👉 将压缩包拷贝到目标机器解压即可使用。")
+
+
+def _verify_bins(dist):
+    """stat 发布目录中的关键二进制文件并输出校验结果"""
+    sizes = {}
+    for bin_rel in REQUIRED_BINS:
+        bin_path = dist / bin_rel
+        if bin_path.exists():
+            sizes[bin_rel] = bin_path.stat().st_size
+    return _report_bins(sizes)
+
+
+def _report_bins(sizes):
+    """根据 {相对路径: 大小} 校验关键二进制文件，全部存在时返回 True"""
+    print("\n🔍 正在校验二进制完整性...")
+    all_exist = True
+    for bin_rel in REQUIRED_BINS:
+        if bin_rel not in sizes:
+            print(f"❌ 缺失: {bin_rel} (可能导致功能不全)")
+            all_exist = False
+        else:
+            size_mb = sizes[bin_rel] / (1024 * 1024)
+            print(f"✅ 存在: {bin_rel} ({size_mb:.1f} MB)")
+    return all_exist
+
+
 if __name__ == "__main__":
-    package_mpm()
+    parser = argparse.ArgumentParser(description=f"打包 {PACKAGE_NAME} 发布包")
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help=f"直接生成 {RELEASE_DIR_NAME}.tar.zst 压缩包，不创建中间目录",
+    )
+    args = parser.parse_args()
+
+    if args.archive:
+        package_mpm_archive()
+    else:
+        package_mpm()